@@ -2,8 +2,27 @@
 核心模塊 - 共享功能
 """
 
-from .backtest import run_backtest, resample_panel_to_4h
-from .trader import OKXTrader, rebalance
+import importlib
 
-__all__ = ['run_backtest', 'resample_panel_to_4h', 'OKXTrader', 'rebalance']
+# 延遲導入：首次訪問時才載入子模組，`from core.trader import ...` 不會觸發 phandas 的導入
+_LAZY_ATTRS = {
+    'run_backtest': '.backtest',
+    'resample_panel_to_4h': '.backtest',
+    'apply_inverse_volatility_weighting': '.backtest',
+    'OKXTrader': '.trader',
+    'rebalance': '.trader',
+}
 
+__all__ = ['run_backtest', 'resample_panel_to_4h', 'apply_inverse_volatility_weighting',
+           'OKXTrader', 'rebalance']
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,8 +5,12 @@
 import pandas as pd
 import numpy as np
 import os
-from typing import Dict, List, Optional
-from phandas import Panel, Factor, backtest, ts_delay, ts_std_dev, cs_sum
+import re
+import json
+import hashlib
+from typing import Dict, Optional
+from phandas import Panel, Factor, backtest, ts_std_dev, cs_sum
+from .factor_utils import factor_frame
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,13 +18,12 @@ logger = logging.getLogger(__name__)
 
 def resample_panel_to_4h(panel_1h: Panel) -> Panel:
     """Resample 1H Panel to 4H Panel"""
-    df_1h = panel_1h.data.copy()
-    df_1h['timestamp'] = pd.to_datetime(df_1h['timestamp'])
-    df_1h = df_1h.set_index('timestamp')
+    # Select only the OHLCV columns the aggregation reads instead of copying the whole frame
+    df_1h = panel_1h.data[['symbol', 'open', 'high', 'low', 'close', 'volume']]
+    df_1h.index = pd.DatetimeIndex(pd.to_datetime(panel_1h.data['timestamp']), name='timestamp')
     
     resampled_dfs = []
-    for symbol in df_1h['symbol'].unique():
-        symbol_data = df_1h[df_1h['symbol'] == symbol].copy()
+    for _, symbol_data in df_1h.groupby('symbol', sort=False):
         resampled = symbol_data.resample('4H').agg({
             'open': 'first',
             'high': 'max',
@@ -31,11 +34,71 @@ def resample_panel_to_4h(panel_1h: Panel) -> Panel:
         })
         resampled_dfs.append(resampled)
     
+    # Panel sorts its data on construction, so no explicit sort is needed here
     df_4h = pd.concat(resampled_dfs).reset_index()
-    df_4h = df_4h.sort_values(['symbol', 'timestamp']).reset_index(drop=True)
     return Panel(df_4h)
 
 
+def apply_inverse_volatility_weighting(
+    strategy_signal: Factor,
+    panel_1h: Panel,
+    window: int = 30 * 24
+) -> Factor:
+    """
+    Scale a strategy signal by cross-sectionally normalized inverse volatility
+    
+    The result does not depend on transaction costs, so callers sweeping cost
+    scenarios can compute it once and pass it to run_backtest with
+    use_inverse_vol_weighting=False.
+    
+    Parameters
+    ----------
+    strategy_signal : Factor
+        Strategy signal factor
+    panel_1h : Panel
+        1H data panel
+    window : int
+        Rolling volatility window (periods)
+    
+    Returns
+    -------
+    Factor
+        Volatility-weighted strategy signal
+    """
+    close_1h = panel_1h['close']
+    close = close_1h.data['factor'].to_numpy(dtype=np.float64)
+    prev_close = close_1h.data.groupby('symbol')['factor'].shift(1).to_numpy(dtype=np.float64)
+
+    # Fused close / ts_delay(close, 1) - 1. The |prev| > 1e-10 guard and the
+    # "((x/ts_delay(x,1))-1)" name mirror phandas' Factor.__truediv__ and
+    # Factor._binary_op (0.17/0.18); keep them in sync if phandas changes either.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        simple_returns = np.where(np.abs(prev_close) > 1e-10, close / prev_close, np.nan) - 1
+    returns = Factor(
+        factor_frame(close_1h, simple_returns),
+        f"(({close_1h.name}/ts_delay({close_1h.name},1))-1)"
+    )
+
+    vol = ts_std_dev(returns, window)
+    inv_vol = 1.0 / (vol + 1e-10)
+    inv_vol_normalized = inv_vol / cs_sum(inv_vol)
+
+    return strategy_signal * inv_vol_normalized
+
+
+def _file_stem(name: str, max_bytes: int = 100) -> str:
+    """Build a filesystem-safe file stem from a (possibly very long) factor name"""
+    # Derived factor names contain '/' (e.g. "(a/b)"), which would be read as a subdirectory
+    stem = re.sub(r'[\\/]', '_', name)
+    if len(stem.encode('utf-8')) <= max_bytes:
+        return stem
+    # Operator-chain names easily exceed NAME_MAX (255 bytes); keep a readable
+    # prefix plus a hash of the full name so distinct strategies stay distinct
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]
+    prefix = stem.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+    return f"{prefix}_{digest}"
+
+
 def run_backtest(
     strategy_signal: Factor,
     panel_1h: Panel,
@@ -43,7 +106,8 @@ def run_backtest(
     initial_capital: float = 100000.0,
     use_inverse_vol_weighting: bool = True,
     save_results: bool = True,
-    output_dir: str = 'data'
+    output_dir: str = 'data',
+    export_json: bool = False
 ) -> 'Backtester':
     """
     Unified backtest function
@@ -64,6 +128,8 @@ def run_backtest(
         Whether to save results
     output_dir : str
         Output directory
+    export_json : bool
+        Also write metrics as `<strategy>_metrics.json` when saving results
     
     Returns
     -------
@@ -74,15 +140,7 @@ def run_backtest(
     
     # Apply inverse volatility weighting (optional)
     if use_inverse_vol_weighting:
-        close_1h = panel_1h['close']
-        returns = close_1h / ts_delay(close_1h, 1) - 1
-
-        # Inline inverse volatility weighting
-        vol = ts_std_dev(returns, 30 * 24)
-        inv_vol = 1.0 / (vol + 1e-10)
-        inv_vol_normalized = inv_vol / cs_sum(inv_vol)
-
-        strategy_signal = strategy_signal * inv_vol_normalized
+        strategy_signal = apply_inverse_volatility_weighting(strategy_signal, panel_1h)
     
     # Run backtest
     bt_results = backtest(
@@ -95,16 +153,36 @@ def run_backtest(
         auto_run=True
     )
     
-    bt_results.calculate_metrics()
+    if bt_results.metrics:
+        bt_results.metrics['annual_turnover'] = calculate_annual_turnover(bt_results)
     
     if save_results:
         os.makedirs(output_dir, exist_ok=True)
-        report_path = os.path.join(output_dir, f"{strategy_signal.name}_report.txt")
+        file_stem = _file_stem(strategy_signal.name)
+        report_path = os.path.join(output_dir, f"{file_stem}_report.txt")
         generate_performance_report(bt_results, report_path)
+        if export_json:
+            metrics_path = os.path.join(output_dir, f"{file_stem}_metrics.json")
+            export_metrics_json(bt_results, metrics_path)
     
     return bt_results
 
 
+def calculate_annual_turnover(bt_results: 'Backtester') -> float:
+    """Annualized average daily turnover (fraction of NAV traded per year)"""
+    # phandas < 0.18 exposes get_daily_turnover_df(), later versions a turnover property
+    if hasattr(bt_results, 'get_daily_turnover_df'):
+        turnover_df = bt_results.get_daily_turnover_df()
+    else:
+        turnover_df = bt_results.turnover
+    
+    if turnover_df.empty:
+        return 0.0
+    
+    daily_turnover = turnover_df['turnover'].to_numpy(dtype=np.float64)
+    return float(np.nanmean(daily_turnover)) * 365.0
+
+
 def generate_performance_report(bt_results: 'Backtester', output_path: Optional[str] = None) -> str:
     """Generate performance report"""
     metrics = bt_results.metrics
@@ -130,6 +208,9 @@ def generate_performance_report(bt_results: 'Backtester', output_path: Optional[
         f"Sharpe Ratio: {metrics.get('sharpe_ratio', 0):.2f}",
         f"Sortino Ratio: {metrics.get('sortino_ratio', 0):.2f}",
         f"Calmar Ratio: {metrics.get('calmar_ratio', 0):.2f}",
+        "",
+        "Trading Activity",
+        f"Annual Turnover: {metrics.get('annual_turnover', 0):.2%}",
     ]
     
     report = "\n".join(report_lines)
@@ -141,3 +222,36 @@ def generate_performance_report(bt_results: 'Backtester', output_path: Optional[
     
     return report
 
+
+def _json_safe(value):
+    """Recursively convert NumPy scalars to Python types and NaN/inf, which are not valid JSON, to None"""
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    return value
+
+
+def export_metrics_json(bt_results: 'Backtester', output_path: Optional[str] = None) -> Dict:
+    """Export backtest metrics in machine-readable JSON form"""
+    history_df = bt_results.portfolio.get_history_df()
+    
+    metrics = _json_safe(bt_results.metrics)
+    
+    result = {
+        'strategy': bt_results.strategy_factor.name,
+        'start': history_df.index[0].strftime('%Y-%m-%d') if not history_df.empty else None,
+        'end': history_df.index[-1].strftime('%Y-%m-%d') if not history_df.empty else None,
+        'metrics': metrics
+    }
+    
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False, allow_nan=False, default=str)
+        logger.info(f"Metrics saved to: {output_path}")
+    
+    return result
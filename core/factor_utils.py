@@ -0,0 +1,20 @@
+"""
+因子數據工具 - 供回測與風險模組共用
+"""
+
+import pandas as pd
+from phandas import Factor
+
+
+def factor_frame(template: Factor, values) -> pd.DataFrame:
+    """
+    以模板因子的 (timestamp, symbol) 列構建新的因子數據
+    
+    以 copy=False 直接引用模板的 timestamp/symbol 列（保留時區等 dtype），
+    不做額外複製；注意 Factor 建構時仍會自行複製一次
+    """
+    return pd.DataFrame({
+        'timestamp': template.data['timestamp'],
+        'symbol': template.data['symbol'],
+        'factor': values
+    }, copy=False)
@@ -5,8 +5,8 @@
 
 import numpy as np
 import pandas as pd
-from phandas import Factor, ts_std_dev, ts_delay
-from typing import Optional
+from phandas import Factor, ts_std_dev
+from .factor_utils import factor_frame
 
 
 def calculate_volatility_targeted_weights(
@@ -36,27 +36,17 @@ def calculate_volatility_targeted_weights(
     Factor
         目標權重因子
     """
-    # 計算實現波動率（年化）
+    # 計算實現波動率
     realized_vol = ts_std_dev(returns, window)
-    realized_vol_annualized = Factor(
-        realized_vol.data.copy().assign(
-            factor=realized_vol.data['factor'] * np.sqrt(annualization_factor)
-        ),
-        "RealizedVol"
-    )
-    
-    # 計算目標權重
-    target_weights = Factor(
-        realized_vol_annualized.data.copy().assign(
-            factor=target_volatility / (realized_vol_annualized.data['factor'] + 1e-10)
-        ),
-        "TargetWeights"
-    )
     
-    # 限制最大權重（避免極端槓桿）
-    target_weights.data['factor'] = target_weights.data['factor'].clip(upper=2.0)
+    # 年化、計算目標權重、限制最大權重（避免極端槓桿）在同一緩衝區內完成
+    weights = realized_vol.data['factor'].to_numpy(dtype=np.float64, copy=True)
+    np.multiply(weights, np.sqrt(annualization_factor), out=weights)
+    np.add(weights, 1e-10, out=weights)
+    np.divide(target_volatility, weights, out=weights)
+    np.minimum(weights, 2.0, out=weights)
     
-    return target_weights
+    return Factor(factor_frame(realized_vol, weights), "TargetWeights")
 
 
 def apply_rebalancing_buffer(
@@ -83,30 +73,22 @@ def apply_rebalancing_buffer(
     Factor
         應用緩衝區後的權重因子
     """
-    current_data = current_weights.data.set_index(['timestamp', 'symbol'])['factor']
-    target_data = target_weights.data.set_index(['timestamp', 'symbol'])['factor']
-    
-    result_df = current_weights.data.copy()
+    # 將目標權重對齊到當前權重的 (timestamp, symbol)，缺失的目標視為 0
+    index = pd.MultiIndex.from_frame(current_weights.data[['timestamp', 'symbol']])
+    target = (
+        target_weights.data.set_index(['timestamp', 'symbol'])['factor']
+        .reindex(index, fill_value=0)
+        .to_numpy(dtype=np.float64)
+    )
+    current = current_weights.data['factor'].to_numpy(dtype=np.float64)
     
-    def apply_buffer(row):
-        timestamp = row['timestamp']
-        symbol = row['symbol']
-        
-        current = current_data.get((timestamp, symbol), 0)
-        target = target_data.get((timestamp, symbol), 0)
-        
-        # 計算緩衝區範圍
-        buffer_lower = target * (1 - buffer_pct)
-        buffer_upper = target * (1 + buffer_pct)
-        
-        # 如果當前權重在緩衝區內，保持不變
-        if buffer_lower <= current <= buffer_upper:
-            return current
-        else:
-            # 超出緩衝區，調整到目標
-            return target
+    # 計算緩衝區範圍
+    buffer_lower = target * (1 - buffer_pct)
+    buffer_upper = target * (1 + buffer_pct)
     
-    result_df['factor'] = result_df.apply(apply_buffer, axis=1)
+    # 當前權重在緩衝區內則保持不變，否則調整到目標
+    within_buffer = (buffer_lower <= current) & (current <= buffer_upper)
+    buffered = np.where(within_buffer, current, target)
     
-    return Factor(result_df, f"BufferedWeights({buffer_pct:.0%})")
+    return Factor(factor_frame(current_weights, buffered), f"BufferedWeights({buffer_pct:.0%})")
 
@@ -24,6 +24,35 @@ def _safe_float(val) -> float:
         return 0.0
 
 
+def _build_current_holdings(positions: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Map positions from get_positions() to holdings keyed by base symbol."""
+    holdings = {}
+    for pos_data in positions.values():
+        symbol = pos_data['symbol'].split('-')[0]
+        notional_usd = pos_data['notional_usd']
+        holdings[symbol] = {
+            'inst_id': pos_data['symbol'],
+            'side': 'long' if notional_usd > 0 else 'short',
+            'qty': pos_data['pos_qty'],
+            'mark_px': pos_data['mark_px'],
+            'entry_px': pos_data['entry_px'],
+            'usd_value': notional_usd
+        }
+    return holdings
+
+
+def _build_target_holdings(target_weights: Dict[str, float], budget: float) -> Dict[str, Dict]:
+    """Convert target weights to USD target holdings."""
+    return {
+        symbol: {
+            'weight': weight,
+            'target_usd': weight * budget,
+            'direction': 'long' if weight > 0 else ('short' if weight < 0 else 'none'),
+        }
+        for symbol, weight in target_weights.items()
+    }
+
+
 class OKXTrader:
     """OKX perpetual swap trading interface."""
     
@@ -226,32 +255,22 @@ class OKXTrader:
             'msg': f"Convert {sz} to {data.get('sz')} (type={convert_type})"
         }
     
-    def place_order(self, inst_id: str, side: str, size: float, 
-                    price: Optional[float] = None, 
-                    pos_side: str = 'long',
-                    reduce_only: bool = False,
-                    _pos_mode: Optional[str] = None) -> Dict:
-        """Place a single order."""
-        ord_type = 'limit' if price else 'market'
-        client_order_id = _generate_client_order_id()
-        td_mode = 'cash' if self.inst_type == 'SPOT' else 'cross'
-        
+    def _build_order_params(self, inst_id: str, side: str, size: float, 
+                            price: Optional[float], pos_side: str, 
+                            reduce_only: bool, pos_mode: Optional[str]) -> Dict:
+        """Build OKX order request parameters."""
         order_params = {
             'instId': inst_id,
-            'tdMode': td_mode,
+            'tdMode': 'cash' if self.inst_type == 'SPOT' else 'cross',
             'side': side,
-            'ordType': ord_type,
+            'ordType': 'limit' if price else 'market',
             'sz': str(size),
-            'clOrdId': client_order_id,
+            'clOrdId': _generate_client_order_id(),
             'tag': '82eebde453a2BCDE',
         }
         
         if self.inst_type in ['SWAP', 'FUTURES']:
-            if _pos_mode is None:
-                account_config = self.get_account_config()
-                _pos_mode = account_config.get('pos_mode')
-            
-            order_params['posSide'] = 'net' if _pos_mode == 'net_mode' else pos_side
+            order_params['posSide'] = 'net' if pos_mode == 'net_mode' else pos_side
             order_params['reduceOnly'] = 'true' if reduce_only else 'false'
         elif not price:
             order_params['tgtCcy'] = 'quote_ccy'
@@ -259,18 +278,33 @@ class OKXTrader:
         if price:
             order_params['px'] = str(price)
         
+        return order_params
+    
+    def place_order(self, inst_id: str, side: str, size: float, 
+                    price: Optional[float] = None, 
+                    pos_side: str = 'long',
+                    reduce_only: bool = False,
+                    _pos_mode: Optional[str] = None) -> Dict:
+        """Place a single order."""
+        if self.inst_type in ['SWAP', 'FUTURES'] and _pos_mode is None:
+            account_config = self.get_account_config()
+            _pos_mode = account_config.get('pos_mode')
+        
+        order_params = self._build_order_params(inst_id, side, size, price, pos_side, 
+                                                reduce_only, _pos_mode)
+        
         res = self.trade_api.place_order(**order_params)
         
         if res['code'] == '0' and res['data']:
             return {
                 'order_id': res['data'][0].get('ordId'),
-                'client_order_id': client_order_id,
+                'client_order_id': order_params['clOrdId'],
                 'status': 'success',
                 'msg': 'Order placed successfully'
             }
         return {'status': 'error', 'msg': res.get('msg', 'Unknown error'), 'code': res.get('code')}
     
-    def place_batch_orders(self, orders: List[Dict]) -> Dict:
+    def place_batch_orders(self, orders: List[Dict], _pos_mode: Optional[str] = None) -> Dict:
         """Place multiple orders (max 20 per request)."""
         if not orders:
             return {'status': 'error', 'msg': 'Orders list is empty'}
@@ -278,41 +312,20 @@ class OKXTrader:
             return {'status': 'error', 'msg': f'Too many orders: {len(orders)}, max is 20'}
         
         batch_orders = []
-        account_config = self.get_account_config()
-        _pos_mode = account_config.get('pos_mode')
+        if _pos_mode is None:
+            account_config = self.get_account_config()
+            _pos_mode = account_config.get('pos_mode')
         
         for order in orders:
-            inst_id = order.get('inst_id')
-            side = order.get('side')
-            size = order.get('size')
-            price = order.get('price')
-            pos_side = order.get('pos_side', 'long')
-            reduce_only = order.get('reduce_only', False)
-            
-            ord_type = 'limit' if price else 'market'
-            client_order_id = _generate_client_order_id()
-            td_mode = 'cash' if self.inst_type == 'SPOT' else 'cross'
-            
-            order_params = {
-                'instId': inst_id,
-                'tdMode': td_mode,
-                'side': side,
-                'ordType': ord_type,
-                'sz': str(size),
-                'clOrdId': client_order_id,
-                'tag': '82eebde453a2BCDE',
-            }
-            
-            if self.inst_type in ['SWAP', 'FUTURES']:
-                order_params['posSide'] = 'net' if _pos_mode == 'net_mode' else pos_side
-                order_params['reduceOnly'] = 'true' if reduce_only else 'false'
-            elif not price:
-                order_params['tgtCcy'] = 'quote_ccy'
-            
-            if price:
-                order_params['px'] = str(price)
-            
-            batch_orders.append(order_params)
+            batch_orders.append(self._build_order_params(
+                inst_id=order.get('inst_id'),
+                side=order.get('side'),
+                size=order.get('size'),
+                price=order.get('price'),
+                pos_side=order.get('pos_side', 'long'),
+                reduce_only=order.get('reduce_only', False),
+                pos_mode=_pos_mode
+            ))
         
         res = self.trade_api.place_multiple_orders(batch_orders)
         
@@ -481,29 +494,8 @@ class OKXTrader:
                    'msg': 'Target weights and budget required. Call get_account_balance_info() for total_equity.'}
         
         base_budget = budget
-        current_positions = self.get_positions()
-        current_holdings = {}
-        
-        for pos_key, pos_data in current_positions.items():
-            symbol = pos_data['symbol'].split('-')[0]
-            notional_usd = pos_data['notional_usd']
-            current_holdings[symbol] = {
-                'inst_id': pos_data['symbol'],
-                'side': 'long' if notional_usd > 0 else 'short',
-                'qty': pos_data['pos_qty'],
-                'mark_px': pos_data['mark_px'],
-                'entry_px': pos_data['entry_px'],
-                'usd_value': notional_usd
-            }
-        
-        target_holdings = {
-            symbol: {
-                'weight': weight,
-                'target_usd': weight * base_budget,
-                'direction': 'long' if weight > 0 else ('short' if weight < 0 else 'none'),
-            }
-            for symbol, weight in target_weights.items()
-        }
+        current_holdings = _build_current_holdings(self.get_positions())
+        target_holdings = _build_target_holdings(target_weights, base_budget)
         
         rebalance_trades = []
         orders_to_execute = []
@@ -571,8 +563,6 @@ class OKXTrader:
         failed_orders = 0
         prepared_orders = []
         order_to_trade_mapping = {}
-        account_config = self.get_account_config()
-        _pos_mode = account_config.get('pos_mode')
         
         for order_info in orders_to_execute:
             inst_id = order_info['inst_id']
@@ -635,7 +625,7 @@ class OKXTrader:
                 failed_orders += 1
         
         if prepared_orders:
-            batch_result = self.place_batch_orders(prepared_orders)
+            batch_result = self.place_batch_orders(prepared_orders, _pos_mode=self.pos_mode)
             
             if batch_result['status'] != 'error' and 'orders' in batch_result:
                 for i, order_result in enumerate(batch_result['orders']):
@@ -705,29 +695,8 @@ class Rebalancer:
         if self.budget is None or self.budget <= 0:
             raise ValueError('Budget must be specified and greater than 0')
         
-        current_positions = self.trader.get_positions()
-        self.current_holdings = {}
-        
-        for pos_key, pos_data in current_positions.items():
-            symbol = pos_data['symbol'].split('-')[0]
-            notional_usd = pos_data['notional_usd']
-            self.current_holdings[symbol] = {
-                'inst_id': pos_data['symbol'],
-                'side': 'long' if notional_usd > 0 else 'short',
-                'qty': pos_data['pos_qty'],
-                'mark_px': pos_data['mark_px'],
-                'entry_px': pos_data['entry_px'],
-                'usd_value': notional_usd
-            }
-        
-        self.target_holdings = {
-            symbol: {
-                'weight': weight,
-                'target_usd': weight * self.budget,
-                'direction': 'long' if weight > 0 else ('short' if weight < 0 else 'none'),
-            }
-            for symbol, weight in self.target_weights.items()
-        }
+        self.current_holdings = _build_current_holdings(self.trader.get_positions())
+        self.target_holdings = _build_target_holdings(self.target_weights, self.budget)
         
         self.all_symbols = set(self.target_holdings.keys()) | set(self.current_holdings.keys())
         